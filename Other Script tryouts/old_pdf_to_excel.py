@@ -2,27 +2,33 @@ import streamlit as st
 import pandas as pd
 from bs4 import BeautifulSoup
 import re
-import xml.etree.ElementTree as ET
 import openpyxl
 from datetime import datetime
+from xml.sax.saxutils import unescape
+
+# One tab-separated row per line; fields cannot contain tabs or newlines, so
+# each group has exactly one way to match and the scan stays linear.
+TABLE_ROW_RE = re.compile(
+    r"^(\d+)\t([^\t\n]+)\t([^\t\n]+)\t(\d+)\t([^\t\n]+)\t([^\t\n]+)\t([^\t\n]+)\t([^\t\n]+)\t(\d+)\t([\d.]+)[^\S\n]*$",
+    re.MULTILINE,
+)
+# Page bodies as written by the OCR dump: <PAGEn>...<CONTENT_FROM_OCR>text</CONTENT_FROM_OCR>
+PAGE_CONTENT_RE = re.compile(r"<PAGE\d+>\s*<CONTENT_FROM_OCR>(.*?)</CONTENT_FROM_OCR>", re.DOTALL)
+
+def iter_page_texts(content):
+    """Yield the OCR text of each page without building a document tree"""
+    for match in PAGE_CONTENT_RE.finditer(content):
+        yield unescape(match.group(1))
 
 def parse_document_content(content):
     """Parse the XML-like content and extract cutoff data"""
-    # Parse XML content
-    try:
-        root = ET.fromstring(f"<root>{content}</root>")
-    except Exception as e:
-        st.error(f"Error parsing document: {e}")
-        return None
-
     data = []
     current_institute = ""
     current_code = ""
     current_district = ""
 
     # First check if there's a table format (like your second document)
-    table_pattern = r"(\d+)\s+([^\t]+)\s+([^\t]+)\s+(\d+)\s+([^\t]+)\s+([^\t]+)\s+([^\t]+)\s+([^\t]+)\s+(\d+)\s+([\d.]+)"
-    table_matches = re.findall(table_pattern, content)
+    table_matches = TABLE_ROW_RE.findall(content)
     
     if table_matches:
         for match in table_matches:
@@ -37,8 +43,7 @@ def parse_document_content(content):
             })
     else:
         # Parse the detailed format (like your first document)
-        for page in root.findall(".//PAGE*"):
-            text = page.find("CONTENT_FROM_OCR").text if page.find("CONTENT_FROM_OCR") is not None else ""
+        for text in iter_page_texts(content):
             
             # Extract institute info
             institute_match = re.search(r"(\d{4}) - ([^\n]+)", text)
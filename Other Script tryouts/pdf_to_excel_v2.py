@@ -6,13 +6,16 @@ from io import BytesIO
 import xlsxwriter
 from tqdm import tqdm
 
+# Data line of the cutoff table, compiled once for all pages
+DATA_LINE_RE = re.compile(r'(\d+)\s+(\w+)\s+([\w\s]+)\s+(\d+)\s+(.+?)\s+(\d+)\s+(.+?)\s+([A-Z0-9]+)\s+(\d+)\s+([\d.]+)')
+
+# University status by college code prefix; any other prefix is Un-Aided
+UNIVERSITY_STATUS = {"1002": "Government Autonomous", "1005": "University Department", "1012": "Government"}
+
 # Function to extract data from a single page
 def extract_data_from_page(page_text):
-    # Define regex patterns for the data lines
-    pattern = r'(\d+)\s+(\w+)\s+([\w\s]+)\s+(\d+)\s+(.+?)\s+(\d+)\s+(.+?)\s+([A-Z0-9]+)\s+(\d+)\s+([\d.]+)'
-    
     # Find all matches in the page text
-    matches = re.findall(pattern, page_text)
+    matches = DATA_LINE_RE.findall(page_text)
     
     # Store extracted data
     data = []
@@ -22,7 +25,7 @@ def extract_data_from_page(page_text):
             "Sr": int(sr),
             "Institute Name": institute_name.strip(),
             "Institute Code": college_code,
-            "University Status": "Government Autonomous" if college_code.startswith("1002") else "University Department" if college_code.startswith("1005") else "Government" if college_code.startswith("1012") else "Un-Aided",
+            "University Status": UNIVERSITY_STATUS.get(college_code[:4], "Un-Aided"),
             "District": district,
             "Seat Type": seat_type,
             "Cutoff Rank": int(rank),
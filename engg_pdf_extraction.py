@@ -1,13 +1,19 @@
 import streamlit as st
-import pandas as pd
 import re
-from pdf2image import convert_from_path, pdfinfo_from_path
-import pytesseract
+from pdf2image import pdfinfo_from_path
 import os
 import logging
-import gc
+import collections
+import functools
 import io
+import itertools
+import queue
+import threading
 import requests
+import xlsxwriter
+from concurrent.futures.process import BrokenProcessPool
+from ocr_utils import (OCR_CONCURRENCY, OCR_DPI, extract_text_layer, new_ocr_executor, ocr_images,
+                       render_ocr_pages, split_pages)
 
 # Configure logging
 logging.basicConfig(
@@ -16,6 +22,55 @@ logging.basicConfig(
     handlers=[logging.StreamHandler()]
 )
 
+# Set DEBUG_DUMP=1 to keep the raw and cleaned OCR text on disk for inspecting extraction problems
+DEBUG_DUMP = os.getenv("DEBUG_DUMP", "").lower() in ("1", "true")
+
+# Page header/footer boilerplate stripped from every page; [|I] and [lI] accept both the OCR misread
+# and the text-layer spelling of the same letter
+HEADER_RE = re.compile(r'Government of Maharashtra\s+State Common Entrance Test Cell\s+Cut Off List for Maharashtra & Minority Seats of CAP Round [|I] for Admission to First Year of Four Year\s+Degree Courses In Engineering and Technology & Master of Engineering and Technology \(Integrated 5 Years\) for the Year 2023-24\s*', re.DOTALL)
+FOOTER_RE = re.compile(r'Legends: Starting character G-General, L-Ladies, End character H-Home University, O-Other than Home University,S-State Level, A[lI]- All India Seat\.\s+Maharashtra State Seats - Cut Off Indicates Maharashtra State General Merit No\.; Figures in bracket Indicates Merit Percentile\.\s*', re.DOTALL)
+# Header and footer boilerplate removed in a single scan of each page
+BOILERPLATE_RE = re.compile(f'{HEADER_RE.pattern}|{FOOTER_RE.pattern}', re.DOTALL)
+
+# A whitespace run containing a line break (any str.splitlines boundary), i.e. line-edge padding and blank lines
+LINE_BREAK_WS_RE = re.compile(r'\s*[\n\r\v\f\x1c-\x1e\x85\u2028\u2029]\s*')
+
+# Cut-off table line patterns
+COLLEGE_RE = re.compile(r'(\d{4}) - (.+?)(?:,\s*([^,\n]+?))?$', re.MULTILINE)
+STATUS_RE = re.compile(r'Status: (.+?)$', re.MULTILINE)
+SECTION_RE = re.compile(r'(Home University Seats Allotted to Home University Candidates|Other Than Home University Seats Allotted to Other Than Home University Candidates|Home University Seats Allotted to Other Than Home University Candidates|Other Than Home University Seats Allotted to Home University Candidates|State Level)')
+# [^\S\n] is whitespace other than a line break, so these never run on into the next line of a page
+SEAT_TYPE_RE = re.compile(r'Stage[^\S\n]+(?P<seat_types>.+?)$', re.MULTILINE)
+RANK_RE = re.compile(r'^[^\S\n]*[iI1](?:[lI}]|[^\S\n])*(?P<rank_tokens>.+)$', re.MULTILINE)  # Handles "i", "I", "1", "il}", "l}" and text-layer "II"/"III"
+PERCENTILE_RE = re.compile(r'^[^\S\n]*\((?P<percentiles>(?:[\d.()]|[^\S\n])+)\)$', re.MULTILINE)
+RANK_NUMBER_RE = re.compile(r'\d+')
+
+# Branch, section, Stage, rank and percentile lines of a page, found in one LINE_RE.finditer() pass.
+# Every match starts at a line start and the alternatives are checked in that order of precedence;
+# each lazy '.*?' prefix (which cannot cross a line break) makes its alternative a search within the line.
+LINE_RE = re.compile(
+    r'^(?:.*?(?P<branch>(?P<branch_code>\d{9}) - (?P<branch_name>.+?)$)'
+    rf'|.*?(?P<section>{SECTION_RE.pattern})'
+    rf'|.*?(?P<stage>{SEAT_TYPE_RE.pattern})'
+    rf'|(?P<rank>{RANK_RE.pattern})'
+    rf'|(?P<percentile>{PERCENTILE_RE.pattern}))',
+    re.MULTILINE
+)
+
+# OCR misreadings of seat-type codes on Stage lines
+SEAT_TYPE_CORRECTIONS = {
+    'EWWS': 'EWS',
+    'NT10': 'NT1O',
+    'GNT10': 'GNT1O',
+    'NT20': 'NT2O',
+    'GNT20': 'GNT2O',
+    'NT30': 'NT3O',
+    'GNT30': 'GNT3O',
+    'LVJSS': 'LVJS'
+}
+# NT categories end in the letter O, which OCR often reads as a zero
+NT_ZERO_RE = re.compile(r'[GL]?NT\d0$')
+
 # Set page config
 st.set_page_config(
     page_title="CareerMantrana: MHT-CET PDF Extraction tool",
@@ -96,131 +151,192 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-def pdf_to_ocr(pdf_path, output_text_file, batch_size=10, dpi=200):
+@st.cache_resource
+def _get_ocr_executor():
+    """Worker pool shared by every run, so each worker loads Tesseract once for the life of the app."""
+    return new_ocr_executor()
+
+def _rasterize_batches(pdf_path, total_pages, batch_size, dpi, batches, stop):
+    """Prepare page batches in the background, handing each one to pdf_to_ocr through a bounded queue.
+
+    Each batch carries the text-layer text of every page (None where missing) and rendered images
+    for just the pages that still need OCR. Gives up once stop is set, when pdf_to_ocr has stopped
+    reading the queue. Runs outside the Streamlit script thread, so it must not log (the UI log
+    handler needs session state).
+    """
+    def put(item):
+        # A plain put would block forever on a full queue nobody reads any more
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+    
+    try:
+        for start in range(0, total_pages, batch_size):
+            end = min(start + batch_size, total_pages)
+            texts = extract_text_layer(pdf_path, start + 1, end)
+            images = render_ocr_pages(pdf_path, start + 1, texts, dpi)
+            if not put((start, end, texts, images)):
+                return
+    except Exception as e:
+        put(e)
+        return
+    put(None)
+
+def pdf_to_ocr(pdf_path, total_pages, output_text_file, batch_size=10, dpi=OCR_DPI):
+    """Yield (page_num, text) for each page as soon as it is read, also saving it to output_text_file with DEBUG_DUMP."""
     logging.info(f"Starting OCR conversion for PDF: {pdf_path}")
+    dump = None
+    producer = None
+    stop = threading.Event()
     try:
-        pdf_info = pdfinfo_from_path(pdf_path)
-        total_pages = pdf_info["Pages"]
         logging.info(f"PDF has {total_pages} pages")
         
-        if os.path.exists(output_text_file):
-            os.remove(output_text_file)
+        if DEBUG_DUMP:
+            dump = open(output_text_file, 'w', encoding='utf-8')
         
-        for start in range(0, total_pages, batch_size):
-            end = min(start + batch_size, total_pages)
-            logging.info(f"Processing OCR batch: pages {start+1} to {end}")
-            images = convert_from_path(pdf_path, dpi=dpi, first_page=start+1, last_page=end)
-            batch_text = ""
-            
-            for i, image in enumerate(images):
-                page_num = start + i + 1
-                logging.info(f"Performing OCR on page {page_num}")
-                text = pytesseract.image_to_string(image)
-                batch_text += f"<PAGE{page_num}>\n<CONTENT_FROM_OCR>\n{text}\n</CONTENT_FROM_OCR>\n</PAGE{page_num}>\n"
-                del image
+        # Poppler renders the next batch while this one is OCR'd; the queue holds at most one batch ahead
+        batches = queue.Queue(maxsize=1)
+        producer = threading.Thread(target=_rasterize_batches,
+                                    args=(pdf_path, total_pages, batch_size, dpi, batches, stop), daemon=True)
+        producer.start()
+        
+        # Tesseract is CPU-bound, so OCR the pages of a batch in parallel workers
+        executor = _get_ocr_executor()
+        in_flight = None
+        ocr_page_count = 0
+        while True:
+            batch = batches.get()
+            if isinstance(batch, Exception):
+                raise batch
+            submitted = None
+            if batch is not None:
+                start, end, texts, images = batch
+                logging.info(f"Processing OCR batch: pages {start+1} to {end}")
+                
+                ocr_texts = iter(())
+                if images:
+                    logging.info(f"Performing OCR on {len(images)} image-only pages between {start+1} and {end}")
+                    ocr_page_count += len(images)
+                    groups = split_pages(images, min(OCR_CONCURRENCY, len(images)))
+                    ocr_texts = itertools.chain.from_iterable(executor.map(ocr_images, groups))
+                    del groups
+                del batch, images
+                submitted = (start, end, texts, ocr_texts)
             
-            with open(output_text_file, 'a', encoding='utf-8') as f:
-                f.write(batch_text)
-            logging.info(f"Batch saved to {output_text_file} (pages {start+1}-{end})")
+            # Hand out the previous batch only once this one is queued on the workers, so its OCR
+            # runs while the caller cleans and extracts the pages already read
+            if in_flight is not None:
+                start, end, texts, ocr_texts = in_flight
+                batch_pages = []
+                for i, text in enumerate(texts):
+                    if text is None:
+                        text = next(ocr_texts)
+                    batch_pages.append((start + i + 1, text))
+                
+                if dump:
+                    dump.writelines(f"<PAGE{page_num}>\n<CONTENT_FROM_OCR>\n{text}\n</CONTENT_FROM_OCR>\n</PAGE{page_num}>\n"
+                                    for page_num, text in batch_pages)
+                    logging.info(f"Batch saved to {output_text_file} (pages {start+1}-{end})")
+                yield from batch_pages
             
-            del images
-            del batch_text
-            gc.collect()
+            if submitted is None:
+                break
+            in_flight = submitted
         
-        logging.info(f"Raw OCR text fully saved to {output_text_file}")
-        with open(output_text_file, 'r', encoding='utf-8') as f:
-            return f.read()
+        logging.info(f"Read {total_pages - ocr_page_count} pages from the PDF text layer, OCR'd {ocr_page_count}")
+        if dump:
+            logging.info(f"Raw OCR text fully saved to {output_text_file}")
     except Exception as e:
         logging.error(f"Error during OCR: {str(e)}")
+        if isinstance(e, BrokenProcessPool):
+            # A crashed worker leaves the pool unusable; start a fresh one on the next run
+            _get_ocr_executor.clear()
         raise
+    finally:
+        # Also reached when OCR fails or the caller closes the generator early; let the producer
+        # finish its current batch and exit instead of waiting on the queue for good
+        stop.set()
+        if producer is not None:
+            producer.join()
+        if dump:
+            dump.close()
 
-def clean_ocr_text(text, batch_size=10):
+def clean_ocr_text(pages, batch_size=10):
+    """Yield (page_num, cleaned_content) for each page from pdf_to_ocr, also saving it to cleaned_ocr_output.txt with DEBUG_DUMP."""
     logging.info("Starting OCR text cleanup")
-    header_pattern = r'Government of Maharashtra\s+State Common Entrance Test Cell\s+Cut Off List for Maharashtra & Minority Seats of CAP Round \| for Admission to First Year of Four Year\s+Degree Courses In Engineering and Technology & Master of Engineering and Technology \(Integrated 5 Years\) for the Year 2023-24\s*'
-    footer_pattern = r'Legends: Starting character G-General, L-Ladies, End character H-Home University, O-Other than Home University,S-State Level, Al- All India Seat\.\s+Maharashtra State Seats - Cut Off Indicates Maharashtra State General Merit No\.; Figures in bracket Indicates Merit Percentile\.\s*'
-    pages = text.split('<PAGE')[1:]
-    total_pages = len(pages)
+    pages = iter(pages)
     cleaned_file = 'cleaned_ocr_output.txt'
+    dump = None
     
-    logging.info(f"Total pages to clean: {total_pages}")
-    if os.path.exists(cleaned_file):
-        logging.info(f"Removing existing {cleaned_file}")
-        os.remove(cleaned_file)
-    
-    for start in range(0, total_pages, batch_size):
-        end = min(start + batch_size, total_pages)
-        logging.info(f"Cleaning batch: pages {start+1} to {end}")
-        batch_cleaned = ""
-        
-        for page_idx in range(start, end):
-            page = pages[page_idx]
-            try:
-                page_content = page.split('<CONTENT_FROM_OCR>')[1].split('</CONTENT_FROM_OCR>')[0]
-            except IndexError:
-                logging.warning(f"Page {page_idx + 1} has malformed OCR content: {page[:100]}...")
-                continue
-            cleaned_content = re.sub(header_pattern, '', page_content, flags=re.DOTALL)
-            cleaned_content = re.sub(footer_pattern, '', cleaned_content, flags=re.DOTALL)
-            cleaned_content = '\n'.join(line.strip() for line in cleaned_content.splitlines() if line.strip())
-            batch_cleaned += f"<PAGE{page.split('>')[0]}>\n<CONTENT_FROM_OCR>\n{cleaned_content}\n</CONTENT_FROM_OCR>\n"
-        
-        logging.info(f"Writing batch to {cleaned_file} (pages {start+1}-{end})")
+    if DEBUG_DUMP:
+        full_path = os.path.abspath(cleaned_file)
+        logging.info(f"Absolute path for {cleaned_file}: {full_path}")
         try:
-            full_path = os.path.abspath(cleaned_file)
-            logging.info(f"Absolute path for {cleaned_file}: {full_path}")
-            with open(cleaned_file, 'a', encoding='utf-8') as f:
-                f.write(batch_cleaned)
-            logging.info(f"Successfully wrote batch to {cleaned_file}")
+            dump = open(cleaned_file, 'w', encoding='utf-8')
         except Exception as e:
             logging.error(f"Failed to write to {cleaned_file}: {str(e)}")
-        
-        del batch_cleaned
-        gc.collect()
     
-    if not os.path.exists(cleaned_file):
-        logging.error(f"{cleaned_file} was not created after processing")
-        raise FileNotFoundError(f"{cleaned_file} was not created")
+    try:
+        while batch := list(itertools.islice(pages, batch_size)):
+            first, last = batch[0][0], batch[-1][0]
+            logging.info(f"Cleaning batch: pages {first} to {last}")
+            cleaned_pages = []
+            
+            for page_num, page_content in batch:
+                cleaned_content = BOILERPLATE_RE.sub('', page_content)
+                # Same result as stripping every line and dropping the blank ones, in one C-level pass
+                cleaned_content = LINE_BREAK_WS_RE.sub('\n', cleaned_content).strip()
+                cleaned_pages.append((page_num, cleaned_content))
+            
+            if dump:
+                logging.info(f"Writing batch to {cleaned_file} (pages {first}-{last})")
+                dump.writelines(f"<PAGE{page_num}>\n<CONTENT_FROM_OCR>\n{cleaned_content}\n</CONTENT_FROM_OCR>\n"
+                                for page_num, cleaned_content in cleaned_pages)
+            yield from cleaned_pages
+    finally:
+        if dump:
+            dump.close()
     
-    logging.info(f"Cleaned OCR text fully saved to {cleaned_file}")
-    with open(cleaned_file, 'r', encoding='utf-8') as f:
-        return f.read()
+    if dump:
+        logging.info(f"Cleaned OCR text fully saved to {cleaned_file}")
+
+def _as_float(value):
+    """Percentile text as a number for the Excel sheet, left as text when OCR garbled it."""
+    try:
+        return float(value)
+    except ValueError:
+        return value
 
+# Stage lines repeat the same handful of seat-type codes on every page, so each distinct token is
+# normalized once
+@functools.lru_cache(maxsize=1024)
 def normalize_seat_type(seat_type):
-    seat_type = seat_type.replace(':', '').upper()
-    corrections = {
-        'EWWS': 'EWS',
-        'NT10': 'NT1O',
-        'GNT10': 'GNT1O',
-        'NT20': 'NT2O',
-        'GNT20': 'GNT2O',
-        'NT30': 'NT3O',
-        'GNT30': 'GNT3O',
-        'LVJSS': 'LVJS',
-        'GNT30,': 'GNT3O',
-        'LNT10': 'LNT1O'
-    }
-    corrected_seat_type = corrections.get(seat_type, seat_type)
-    if re.match(r'^[GL]?[A-Z]{1,4}0$', corrected_seat_type):
-        corrected_seat_type = corrected_seat_type[:-1] + 'O'
-    return corrected_seat_type
+    """Upper-case a Stage-line seat type, dropping trailing punctuation and fixing common OCR misreads."""
+    seat_type = seat_type.strip().rstrip(':;,.').upper()
+    if seat_type in SEAT_TYPE_CORRECTIONS:
+        return SEAT_TYPE_CORRECTIONS[seat_type]
+    if NT_ZERO_RE.match(seat_type):
+        return seat_type[:-1] + 'O'
+    return seat_type.strip()
 
-def extract_data_to_excel(text, log_container, batch_size=10):
+def extract_data_to_excel(pages, log_container, total_pages, batch_size=10):
+    """Pull cleaned pages through the OCR/cleanup pipeline and build the cut-off Excel workbook."""
     logging.info("Starting data extraction from cleaned OCR text")
     columns = ['Sr', 'Stage', 'District', 'Institute Status', 'College Code', 'Institute Name', 
                'Branch Code', 'Branch Name', 'Seat Type', 'Rank', 'Percentile']
-    data = []
+    output = io.BytesIO()
+    # Rows go straight into the sheet as they are parsed; constant_memory flushes each one to a temp file
+    # instead of holding the whole table in RAM. No cell is a link, so skip the per-string URL check.
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True, 'strings_to_urls': False})
+    worksheet = workbook.add_worksheet()
+    worksheet.write_row(0, 0, columns, workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}))
     sr_no = 1
-    pages = text.split('<PAGE')[1:]
-    total_pages = len(pages)
-    logging.info(f"Found {total_pages} pages in cleaned OCR text")
-
-    college_pattern = r'(\d{4}) - (.+?)(?:,\s*([^,\n]+?))?$'
-    branch_pattern = r'(\d{9}) - (.+?)$'
-    status_pattern = r'Status: (.+?)$'
-    section_pattern = r'(Home University Seats Allotted to Home University Candidates|Other Than Home University Seats Allotted to Other Than Home University Candidates|Home University Seats Allotted to Other Than Home University Candidates|Other Than Home University Seats Allotted to Home University Candidates|State Level)'
-    seat_type_pattern = r'Stage\s+(.+?)$'
-    rank_pattern = r'^\s*[iI1][l}l\s]*(.+)$'  # Handles "i", "I", "1", "il}", "l}"
-    percentile_pattern = r'^\s*\(([\d.\s\(\)]+)\)$'
+    pages = iter(pages)
+    logging.info(f"Expecting {total_pages} pages from the cleanup stage")
 
     # OCR correction dictionary for ranks
     ocr_corrections = {
@@ -233,132 +349,105 @@ def extract_data_to_excel(text, log_container, batch_size=10):
 
     progress_bar = st.progress(0)
     status_text = st.empty()
+    # Each widget update is a websocket round trip, so refresh the UI about 20 times over the run
+    update_every = max(1, total_pages // (batch_size * 20))
     
-    def normalize_seat_type(seat_type):
-        seat_type = re.sub(r'[:;,\.]+$', '', seat_type.strip()).upper()
-        corrections = {
-            'EWWS': 'EWS',
-            'NT10': 'NT1O',
-            'GNT10': 'GNT1O',
-            'NT20': 'NT2O',
-            'GNT20': 'GNT2O',
-            'NT30': 'NT3O',
-            'GNT30': 'GNT3O',
-            'LVJSS': 'LVJS'
-        }
-        if seat_type in corrections:
-            return corrections[seat_type]
-        if re.match(r'^[GL]?NT\d0$', seat_type):
-            return seat_type[:-1] + 'O'
-        return seat_type.strip()
-
-    for start in range(0, total_pages, batch_size):
-        end = min(start + batch_size, total_pages)
+    # Pull pages until the pipeline is exhausted, so pdf_to_ocr and clean_ocr_text run to completion
+    # (final log lines, dump files closed); total_pages only drives the progress bar
+    start = 0
+    while batch := list(itertools.islice(pages, batch_size)):
+        end = start + len(batch)
         logging.info(f"Processing extraction batch: pages {start+1} to {end}")
-        batch_data = []
+        batch_start_rows = sr_no
         
-        for page_idx in range(start, end):
-            page = pages[page_idx]
-            page_content = page.split('<CONTENT_FROM_OCR>')[1].split('</CONTENT_FROM_OCR>')[0]
-            logging.info(f"Processing page {page_idx + 1}: {page.split('>')[0]}")
+        for page_num, page_content in batch:
+            logging.info(f"Processing page {page_num}")
             
-            college_match = re.search(college_pattern, page_content, re.MULTILINE)
+            college_match = COLLEGE_RE.search(page_content)
             if college_match:
                 college_code = college_match.group(1)
                 institute_name = college_match.group(2).strip()
                 district = college_match.group(3).strip() if college_match.group(3) else "Unknown"
                 logging.info(f"Extracted college: {college_code} - {institute_name}, {district}")
             else:
-                logging.warning(f"No college details found in page {page_idx + 1}")
+                logging.warning(f"No college details found in page {page_num}")
                 continue
 
-            status_match = re.search(status_pattern, page_content, re.MULTILINE)
+            status_match = STATUS_RE.search(page_content)
             institute_status = status_match.group(1) if status_match else ''
             logging.info(f"Institute Status: {institute_status}")
 
-            lines = page_content.split('\n')
             current_branch_code = None
             current_branch_name = None
             current_section = None
             base_seat_types = None
+            # Seat types of the most recent Stage line on the page, kept across branch/section resets
+            last_stage_seat_types = None
             seat_types = None
             ranks = None
             percentiles = None
             current_stage = 1
 
             def add_rows():
-                nonlocal sr_no, batch_data
+                nonlocal sr_no
                 if seat_types and ranks and current_branch_code:
                     for j, seat_type in enumerate(seat_types):
                         if j < len(ranks):
                             rank = ranks[j]
                             percentile = percentiles[j] if percentiles and j < len(percentiles) else None
-                            batch_data.append([sr_no, current_stage, district, institute_status, college_code, institute_name, 
-                                              current_branch_code, current_branch_name, seat_type, rank, percentile])
-                            logging.info(f"Added row: Sr {sr_no}, Stage {current_stage}, Seat Type {seat_type}, Rank {rank}, Percentile {percentile}")
+                            worksheet.write_row(sr_no, 0, [sr_no, current_stage, district, institute_status, college_code, institute_name,
+                                                           current_branch_code, current_branch_name, seat_type, rank, percentile])
+                            logging.debug("Added row: Sr %s, Stage %s, Seat Type %s, Rank %s, Percentile %s", sr_no, current_stage, seat_type, rank, percentile)
                             sr_no += 1
                 else:
                     logging.warning(f"Skipping row addition: Missing data - Seat Types: {seat_types}, Ranks: {ranks}, Branch Code: {current_branch_code}")
 
-            i = 0
-            while i < len(lines):
-                line = lines[i].strip()
+            # Cleaned pages have no blank lines or line padding, so lines can be matched in place
+            for line_match in LINE_RE.finditer(page_content):
+                line_kind = line_match.lastgroup
 
-                branch_match = re.search(branch_pattern, line)
-                if branch_match:
+                if line_kind == 'branch':
                     add_rows()
-                    current_branch_code = branch_match.group(1)
-                    current_branch_name = branch_match.group(2)
+                    current_branch_code = line_match.group('branch_code')
+                    current_branch_name = line_match.group('branch_name')
                     logging.info(f"Extracted branch: {current_branch_code} - {current_branch_name}")
                     base_seat_types = None
                     seat_types = None
                     ranks = None
                     percentiles = None
                     current_stage = 1
-                    i += 1
                     continue
 
-                section_match = re.search(section_pattern, line)
-                if section_match:
+                if line_kind == 'section':
                     add_rows()
-                    current_section = section_match.group(1)
-                    logging.info(f"Section: {current_section}")
+                    current_section = line_match.group('section')
+                    logging.debug("Section: %s", current_section)
                     base_seat_types = None
                     seat_types = None
                     ranks = None
                     percentiles = None
                     current_stage = 1
-                    i += 1
                     continue
 
-                seat_type_match = re.search(seat_type_pattern, line)
-                if seat_type_match:
+                if line_kind == 'stage':
                     add_rows()
-                    base_seat_types = [normalize_seat_type(st) for st in seat_type_match.group(1).split()]
+                    base_seat_types = [normalize_seat_type(st) for st in line_match.group('seat_types').split()]
                     seat_types = base_seat_types.copy()
-                    logging.info(f"Normalized base seat types: {base_seat_types}")
+                    last_stage_seat_types = base_seat_types
+                    logging.debug("Normalized base seat types: %s", base_seat_types)
                     current_stage = 1
-                    i += 1
                     continue
 
-                rank_match = re.search(rank_pattern, line)
-                if rank_match:
+                if line_kind == 'rank':
                     if ranks and seat_types and current_branch_code:
                         add_rows()
                         current_stage += 1
-                    # Use base_seat_types from Stage 1 if available, otherwise backtrack
-                    if not base_seat_types and current_section:
-                        prev_line_idx = i - 1
-                        while prev_line_idx >= 0:
-                            prev_line = lines[prev_line_idx].strip()
-                            if prev_line and not re.search(section_pattern, prev_line) and not re.search(percentile_pattern, prev_line):
-                                if re.search(seat_type_pattern, prev_line):
-                                    base_seat_types = [normalize_seat_type(st) for st in re.search(seat_type_pattern, prev_line).group(1).split()]
-                                    logging.info(f"Backtracked to seat types from Stage line: {base_seat_types}")
-                                    break
-                                prev_line_idx -= 1
+                    # Use base_seat_types from Stage 1 if available, otherwise fall back to the last Stage line
+                    if not base_seat_types and current_section and last_stage_seat_types:
+                        base_seat_types = last_stage_seat_types
+                        logging.debug("Backtracked to seat types from Stage line: %s", base_seat_types)
                     # Extract ranks
-                    rank_str = rank_match.group(1).strip()
+                    rank_str = line_match.group('rank_tokens').strip()
                     rank_tokens = rank_str.split()
                     ranks = []
                     for token in rank_tokens:
@@ -367,66 +456,60 @@ def extract_data_to_excel(text, log_container, batch_size=10):
                         corrected_token = ocr_corrections.get(token, token)
                         if corrected_token == '':  # Handle "l}" or "il}" by skipping to next token
                             continue
-                        numbers = re.findall(r'\d+', corrected_token)
-                        if numbers:
-                            ranks.append(numbers[0])
+                        number_match = RANK_NUMBER_RE.search(corrected_token)
+                        if number_match:
+                            ranks.append(int(number_match.group()))
                         else:
                             logging.warning(f"Could not extract number from rank token: {token}")
                             ranks.append(corrected_token)
                     if not ranks:
-                        logging.warning(f"Failed to parse ranks from line: {line}")
+                        logging.warning(f"Failed to parse ranks from line: {line_match.group()}")
                         ranks = None
                     else:
-                        logging.info(f"Ranks after correction: {ranks}")
+                        logging.debug("Ranks after correction: %s", ranks)
                         # Set seat_types for this stage, default to base_seat_types if not already set
                         if base_seat_types:
                             seat_types = base_seat_types[:len(ranks)]
-                            logging.info(f"Adjusted seat types for Stage {current_stage}: {seat_types}")
+                            logging.debug("Adjusted seat types for Stage %s: %s", current_stage, seat_types)
                         else:
                             logging.warning(f"No base_seat_types available for Stage {current_stage}, skipping row addition")
-                    i += 1
                     continue
 
-                percentile_match = re.search(percentile_pattern, line)
-                if percentile_match:
-                    percentiles = percentile_match.group(1).split(') (')
-                    percentiles = [p.strip('()') for p in percentiles]
-                    logging.info(f"Percentiles: {percentiles}")
-                    i += 1
-                    continue
-
-                i += 1
+                if line_kind == 'percentile':
+                    percentiles = line_match.group('percentiles').split(') (')
+                    percentiles = [_as_float(p.strip('()')) for p in percentiles]
+                    logging.debug("Percentiles: %s", percentiles)
 
             add_rows()
 
-        if batch_data:
-            data.extend(batch_data)
-            logging.info(f"Batch data added: {len(batch_data)} rows")
-        
-        progress = min((start + batch_size) / total_pages, 1.0)
-        progress_bar.progress(progress)
-        status_text.text(f"Processing batch: pages {start+1} to {end} ({len(batch_data)} rows extracted)")
+        batch_rows = sr_no - batch_start_rows
+        if batch_rows:
+            logging.info(f"Batch data added: {batch_rows} rows")
         
-        log_container.text_area("Processing Logs", value=st.session_state.logs, height=300, key=f"log_area_{start}")
-        
-        del batch_data
-        gc.collect()
+        if (start // batch_size) % update_every == 0:
+            progress = min(end / total_pages, 1.0)
+            progress_bar.progress(progress)
+            status_text.text(f"Processing batch: pages {start+1} to {end} ({batch_rows} rows extracted)")
+            
+            log_container.text_area("Processing Logs", value="".join(st.session_state.logs), height=300, key=f"log_area_{start}")
+        start = end
 
-    logging.info(f"Total rows in data: {len(data)}")
-    if not data:
+    logging.info(f"Total rows in data: {sr_no - 1}")
+    if sr_no == 1:
         logging.error("No data extracted from the PDF")
 
-    df = pd.DataFrame(data, columns=columns)
-    logging.info(f"Created final DataFrame with {len(df)} rows")
-    
-    output = io.BytesIO()
-    df.to_excel(output, index=False, engine='openpyxl')
+    workbook.close()
     output.seek(0)
     
     progress_bar.progress(1.0)
     status_text.text("Processing complete!")
     return output
 
+@st.cache_data(ttl=3600, show_spinner=False)
+def _url_available(url):
+    """Check a remote asset once an hour instead of on every script rerun; the browser loads the asset itself."""
+    return requests.get(url, timeout=5).status_code == 200
+
 def main():
     # Create two columns: 70% left, 30% right
     col1, col2 = st.columns([7, 3])
@@ -436,8 +519,7 @@ def main():
         # Fetch and display the logo at the top
         logo_url = "https://www.careermantrana.com/images/mainLogo.svg"
         try:
-            response = requests.get(logo_url)
-            if response.status_code == 200:
+            if _url_available(logo_url):
                 st.markdown(
                     f'<img src="{logo_url}" alt="Career Mantra Logo" style="max-width: 300px; display: block; margin: 0 auto;">',
                     unsafe_allow_html=True
@@ -452,7 +534,9 @@ def main():
 
         # Initialize session state
         if 'logs' not in st.session_state:
-            st.session_state.logs = ""
+            # Only the most recent log lines are kept for the log panel, so each re-render sends a bounded
+            # amount of text; the full log still goes to the console handler
+            st.session_state.logs = collections.deque(maxlen=500)
         if 'processing_complete' not in st.session_state:
             st.session_state.processing_complete = False
         
@@ -468,7 +552,7 @@ def main():
             class StreamlitLogHandler(logging.Handler):
                 def emit(self, record):
                     log_entry = self.format(record)
-                    st.session_state.logs += log_entry + "\n"
+                    st.session_state.logs.append(log_entry + "\n")
             
             log_handler = StreamlitLogHandler()
             logging.getLogger().addHandler(log_handler)
@@ -480,15 +564,18 @@ def main():
             if not st.session_state.processing_complete:
                 if st.button("Process PDF"):
                     with st.spinner("Processing..."):
-                        ocr_text = pdf_to_ocr(pdf_path, raw_ocr_text_file, batch_size)
-                        cleaned_text = clean_ocr_text(ocr_text, batch_size)
-                        excel_bytes = extract_data_to_excel(cleaned_text, log_container, batch_size)
+                        total_pages = pdfinfo_from_path(pdf_path)["Pages"]
+                        # Each stage pulls pages from the previous one, so OCR, cleanup and extraction
+                        # run page by page without going through the text files
+                        ocr_pages = pdf_to_ocr(pdf_path, total_pages, raw_ocr_text_file, batch_size)
+                        cleaned_pages = clean_ocr_text(ocr_pages, batch_size)
+                        excel_bytes = extract_data_to_excel(cleaned_pages, log_container, total_pages, batch_size)
                         
                         st.session_state.processing_complete = True
                         st.session_state.excel_bytes = excel_bytes
             
             if st.session_state.processing_complete and 'excel_bytes' in st.session_state:
-                log_container.text_area("Processing Logs", value=st.session_state.logs, height=300, key="log_area_final")
+                log_container.text_area("Processing Logs", value="".join(st.session_state.logs), height=300, key="log_area_final")
                 if st.session_state.excel_bytes.getvalue():
                     st.download_button(
                         label="Download Cut-off Excel",
@@ -499,9 +586,9 @@ def main():
                 else:
                     st.error("Generated Excel file is empty. Check logs for details.")
             
-            for file in [pdf_path, raw_ocr_text_file]:
-                if os.path.exists(file):
-                    os.remove(file)
+            # The raw OCR dump is only written with DEBUG_DUMP, and then it is kept for inspection
+            if os.path.exists(pdf_path):
+                os.remove(pdf_path)
             
             logging.getLogger().removeHandler(log_handler)
 
@@ -509,8 +596,7 @@ def main():
     with col2:
         image_url = "https://www.careermantrana.com/assets/heroSection1-irHkr2pB.svg"
         try:
-            response = requests.get(image_url)
-            if response.status_code == 200:
+            if _url_available(image_url):
                 st.image(image_url, use_column_width=True)
             else:
                 st.warning("Could not load image from URL.")
@@ -0,0 +1,144 @@
+"""OCR helpers shared by the Streamlit apps: text-layer reading, page rendering and grouping, and Tesseract workers.
+
+Kept free of Streamlit so process-pool workers can import it without loading the UI.
+"""
+import itertools
+import logging
+import os
+import re
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytesseract
+from pdf2image import convert_from_bytes, convert_from_path
+
+# Pages are already spread across OCR workers, so keep each Tesseract single-threaded instead of
+# oversubscribing the cores. libgomp reads this once, when the tesserocr import loads it, so it must be
+# set before that import; the tesseract CLI fallback inherits it from the environment.
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+try:
+    from tesserocr import PyTessBaseAPI
+except ImportError:  # tesserocr is optional; fall back to the tesseract CLI via pytesseract
+    PyTessBaseAPI = None
+
+def _env_int(name, default, low, high=None):
+    """Read an integer setting from the environment, clamped to [low, high].
+
+    An unset or non-integer value falls back to default rather than failing the import.
+    """
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        logging.getLogger(__name__).warning("Ignoring %s=%r, not an integer; using %d", name, raw, default)
+        return default
+    value = max(low, value)
+    return value if high is None else min(value, high)
+
+# Number of pages OCR'd concurrently; override with the OCR_CONCURRENCY environment variable
+OCR_CONCURRENCY = _env_int("OCR_CONCURRENCY", os.cpu_count() or 1, 1)
+
+# Resolution image-only pages are rendered at for OCR; lowering it (e.g. OCR_DPI=150) trades accuracy
+# on the small table fonts for less rasterization and OCR work per page
+OCR_DPI = _env_int("OCR_DPI", 200, 1)
+
+# Tesseract page segmentation mode (0-13); 3 (full automatic layout analysis) is Tesseract's own default,
+# 6 treats each page as one uniform block and skips layout analysis
+OCR_PSM = _env_int("OCR_PSM", 3, 0, 13)
+
+# Pages whose embedded text layer has at least this many characters are not OCR'd
+MIN_TEXT_LAYER_CHARS = 100
+
+# Column padding inserted by pdftotext -layout
+LAYOUT_SPACES_RE = re.compile(r'[ \t]+')
+
+# Tesseract engine of the current OCR worker, loaded once by init_ocr_worker when tesserocr is available
+_ocr_state = threading.local()
+
+def init_ocr_worker():
+    """Load the Tesseract language model once per OCR worker."""
+    _ocr_state.api = PyTessBaseAPI(psm=OCR_PSM) if PyTessBaseAPI is not None else None
+
+def ocr_images(images):
+    """OCR a group of page images, returning one text per page.
+
+    Without tesserocr the whole group goes to a single tesseract run as a multi-page TIFF, so the
+    language model is loaded once per group instead of once per page.
+    """
+    api = getattr(_ocr_state, 'api', None)
+    if api is not None:
+        texts = []
+        for image in images:
+            api.SetImage(image)
+            texts.append(api.GetUTF8Text())
+        return texts
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tiff_path = os.path.join(tmp_dir, 'pages.tif')
+        images[0].save(tiff_path, save_all=True, append_images=images[1:], compression='tiff_lzw')
+        text = pytesseract.image_to_string(tiff_path, config=f'--psm {OCR_PSM}')
+    # tesseract ends every page with a form feed
+    texts = text.split('\f')[:len(images)]
+    return texts + [''] * (len(images) - len(texts))
+
+def new_ocr_executor():
+    """Start a pool of OCR_CONCURRENCY workers for ocr_images, each loading its Tesseract engine once.
+
+    tesserocr releases the GIL while it recognizes a page, so with it the workers are threads and page
+    images never have to be pickled to another process; the tesseract CLI fallback uses processes.
+    """
+    executor_class = ThreadPoolExecutor if PyTessBaseAPI is not None else ProcessPoolExecutor
+    return executor_class(max_workers=OCR_CONCURRENCY, initializer=init_ocr_worker)
+
+def split_pages(images, n_groups):
+    """Split a batch into n_groups contiguous groups whose sizes differ by at most one page."""
+    size, extra = divmod(len(images), n_groups)
+    groups, start = [], 0
+    for g in range(n_groups):
+        end = start + size + (1 if g < extra else 0)
+        groups.append(images[start:end])
+        start = end
+    return groups
+
+def extract_text_layer(pdf, first_page, last_page):
+    """Return the embedded text of each page in the range via poppler's pdftotext, or None where a page needs OCR.
+
+    pdf is a file path, or the PDF's bytes, which are piped to pdftotext on stdin.
+    """
+    page_count = last_page - first_page + 1
+    from_bytes = isinstance(pdf, bytes)
+    try:
+        result = subprocess.run(
+            ['pdftotext', '-layout', '-enc', 'UTF-8', '-f', str(first_page), '-l', str(last_page),
+             '-' if from_bytes else pdf, '-'],
+            input=pdf if from_bytes else None, capture_output=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return [None] * page_count
+    # pdftotext ends every page with a form feed
+    pages = result.stdout.decode('utf-8', errors='replace').split('\f')
+    texts = []
+    for i in range(page_count):
+        text = LAYOUT_SPACES_RE.sub(' ', pages[i]) if i < len(pages) else ''
+        texts.append(text if len(text.strip()) >= MIN_TEXT_LAYER_CHARS else None)
+    return texts
+
+def render_ocr_pages(pdf, first_page, texts, dpi=OCR_DPI):
+    """Render the pages extract_text_layer returned None for, in page order.
+
+    pdf is a file path or the PDF's bytes; texts is extract_text_layer's result for the pages from first_page.
+    """
+    convert = convert_from_bytes if isinstance(pdf, bytes) else convert_from_path
+    ocr_page_nums = [first_page + i for i, text in enumerate(texts) if text is None]
+    images = []
+    # Render each contiguous run of image-only pages with one poppler call
+    for _, run in itertools.groupby(enumerate(ocr_page_nums), key=lambda item: item[1] - item[0]):
+        run = [page_num for _, page_num in run]
+        # Grayscale pages are a third of the size of RGB and OCR just as well
+        images += convert(pdf, dpi=dpi, first_page=run[0], last_page=run[-1],
+                          grayscale=True, thread_count=min(OCR_CONCURRENCY, len(run)))
+    return images
@@ -2,85 +2,146 @@ import streamlit as st
 import pandas as pd
 import re
 from io import BytesIO
-import base64
-import pytesseract
 from PIL import Image
-from pdf2image import convert_from_bytes
+from pdf2image import pdfinfo_from_bytes
+import itertools
 import logging
+import os
+import xlsxwriter
+from ocr_utils import (OCR_CONCURRENCY, OCR_DPI, extract_text_layer, new_ocr_executor, ocr_images,
+                       render_ocr_pages, split_pages)
 
 logging.basicConfig(
     filename='ocr_output.log',
-    level=logging.DEBUG,  # Changed to DEBUG to capture debug messages
+    # Only warnings and errors by default; LOGLEVEL=DEBUG also records every page's OCR text
+    level=os.getenv("LOGLEVEL", "WARNING").upper(),
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-def ocr_pdf_to_text(pdf_file, batch_size=5, dpi=200):
+# Cutoff extraction patterns, compiled once and reused for every college, branch and section block
+COLLEGE_RE = re.compile(r'(\d{4,5})\s*[-–]\s*(.*?)(?=\n\d{4,5}\s*[-–]|\Z)', re.DOTALL)
+INSTITUTE_NAME_RE = re.compile(r'^(.*?)(?=\n\d{6,}\s*[-–]|\nStatus|\Z)', re.MULTILINE | re.DOTALL)
+DISTRICT_RE = re.compile(r',\s*(\w+)$|(\w+)\s*(?:University|College|Institute)')
+BRANCH_RE = re.compile(r'(\d{6,})\s*[-–]\s*(.*?)(?=\n\d{6,}\s*[-–]|\Z)', re.DOTALL)
+STATUS_RE = re.compile(r'Status:\s*(.*?)(?=\n|$)')
+SECTION_RE = re.compile(r'(State Level|Home University Seats.*?|Other Than Home University Seats.*?)\s*(?:Stage\s+([A-Z\s:]+?)\s*[\|\s]\s*([\d\s,]+?)(?:\s*(\(.*?)?)?)', re.DOTALL)
+SEAT_TYPE_RE = re.compile(r'[A-Z][A-Z0-9]+')
+PERCENTILE_RE = re.compile(r'\((\d+\.\d+|\d+)\)')
+
+# Common OCR slips cleaned up before extraction: en/em dashes read for the code separator hyphen,
+# letter O/l/I read for a digit inside a number, and runs of spaces and tabs
+DASH_TABLE = str.maketrans({'–': '-', '—': '-'})
+DIGIT_ZERO_RE = re.compile(r'(?<=\d)[Oo](?=\d)')
+DIGIT_ONE_RE = re.compile(r'(?<=\d)[lI](?=\d)')
+SPACE_RUN_RE = re.compile(r'[ \t]+')
+
+# Columns of the extracted cutoff table, in output order (after the "Sr" autonumber)
+COLUMNS = ("District", "Home University", "Institute Name", "College Code", "Branch Code",
+           "Branch Name", "Status", "Seat Type", "Cutoff (Rank)", "Cutoff (Percentile)")
+
+def _clean_ocr(text):
+    """Normalize OCR quirks that would otherwise break the extraction patterns."""
+    text = text.translate(DASH_TABLE)
+    text = DIGIT_ZERO_RE.sub('0', text)
+    text = DIGIT_ONE_RE.sub('1', text)
+    return SPACE_RUN_RE.sub(' ', text)
+
+class IncompleteOCRError(Exception):
+    """Some page batches of a PDF failed; text holds the pages that were read.
+
+    Raised rather than returned so st.cache_data does not keep the partial result for the upload.
+    """
+    def __init__(self, message, text):
+        super().__init__(message)
+        self.text = text
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def ocr_pdf_to_text(pdf_content, batch_size=5, dpi=OCR_DPI):
     """
-    Convert PDF to text using OCR in batches to manage memory and log the output
+    Convert PDF bytes to text in batches to manage memory and log the output. Pages with an embedded
+    text layer are read directly; only image-only pages are rendered and OCR'd.
+    Cached on the PDF bytes, so reruns of the script for the same upload skip the OCR; failures raise
+    (IncompleteOCRError when only some batches failed) so they are never cached.
     """
-    pdf_content = pdf_file.read()
-    full_text = ""
+    # Page texts are collected and joined once at the end; += would copy all prior text on every page
+    page_texts = []
     
-    # Get total page count
+    # Get total page count from the PDF metadata, without rendering any page
     try:
-        images = convert_from_bytes(pdf_content, dpi=dpi, size=(None, None))  # Just to get count
-        total_pages = len(images)
-        del images  # Free memory immediately
+        total_pages = pdfinfo_from_bytes(pdf_content)["Pages"]
     except Exception as e:
-        st.error(f"Failed to get page count: {str(e)}")
-        logging.error(f"Failed to get page count: {str(e)}")
-        return ""
+        logging.error("Failed to get page count: %s", e)
+        raise RuntimeError(f"Failed to get page count: {e}") from e
     
-    # Process in batches
-    for start_page in range(0, total_pages, batch_size):
-        end_page = min(start_page + batch_size, total_pages)
-        st.write(f"Processing pages {start_page + 1} to {end_page} of {total_pages}...")
-        
-        try:
-            images = convert_from_bytes(pdf_content, dpi=dpi, first_page=start_page + 1, last_page=end_page)
-            for i, image in enumerate(images):
-                page_num = start_page + i + 1
-                text = pytesseract.image_to_string(image)
-                full_text += f"\n--- Page {page_num} ---\n{text}"
-                # Log the OCR output for this page
-                logging.info(f"Page {page_num} OCR Output:\n{text}")
-                st.write(f"OCR extracted text from page {page_num}:\n{text[:500]}...")
-                del image  # Free memory
-            del images  # Free batch memory
-        except Exception as e:
-            st.error(f"Error processing pages {start_page + 1} to {end_page}: {str(e)}")
-            logging.error(f"Error processing pages {start_page + 1} to {end_page}: {str(e)}")
-            continue
+    # Process in batches; Tesseract is CPU-bound, so the pages of a batch are OCR'd in parallel workers
+    progress_bar = st.progress(0.0)
+    status_text = st.empty()
+    # Page previews are shown together once all pages are read, rather than one element per page
+    previews = []
+    failed_batches = []
+    with new_ocr_executor() as executor:
+        for start_page in range(0, total_pages, batch_size):
+            end_page = min(start_page + batch_size, total_pages)
+            status_text.text(f"Processing pages {start_page + 1} to {end_page} of {total_pages}...")
+            
+            try:
+                texts = extract_text_layer(pdf_content, start_page + 1, end_page)
+                images = render_ocr_pages(pdf_content, start_page + 1, texts, dpi)
+                # One group of pages per worker; map returns the groups, and so the OCR texts, in page order
+                ocr_texts = iter(())
+                if images:
+                    groups = split_pages(images, min(OCR_CONCURRENCY, len(images)))
+                    ocr_texts = itertools.chain.from_iterable(executor.map(ocr_images, groups))
+                    del groups
+                for i, text in enumerate(texts):
+                    page_num = start_page + i + 1
+                    if text is None:
+                        text = next(ocr_texts)
+                    page_texts.append(f"\n--- Page {page_num} ---\n{text}")
+                    # Log the OCR output for this page
+                    logging.debug("Page %d OCR Output:\n%s", page_num, text)
+                    previews.append(f"Page {page_num}:\n{text[:500]}...")
+                del images  # Free batch memory
+                progress_bar.progress(end_page / total_pages)
+            except Exception as e:
+                st.error(f"Error processing pages {start_page + 1} to {end_page}: {str(e)}")
+                logging.error("Error processing pages %d to %d: %s", start_page + 1, end_page, e)
+                failed_batches.append(f"{start_page + 1}-{end_page}")
+                continue
     
-    return full_text
+    status_text.text(f"Read {total_pages} pages")
+    with st.expander("OCR log"):
+        st.text("\n\n".join(previews))
+    if failed_batches:
+        raise IncompleteOCRError(f"Could not read pages {', '.join(failed_batches)}", "".join(page_texts))
+    return "".join(page_texts)
 
+@st.cache_data(show_spinner=False, max_entries=8)
 def extract_data_from_text(text):
     """
-    Extract cutoff data from OCR'd text with corrected district, rank, and percentile extraction
+    Extract cutoff data from OCR'd text with corrected district, rank, and percentile extraction,
+    returned as one list per column of COLUMNS
     """
-    extracted_data = []
+    extracted_data = {column: [] for column in COLUMNS}
+    text = _clean_ocr(text)
     
     # Extract district from institute name (more reliable than header)
-    college_pattern = r'(\d{4,5})\s*[-–]\s*(.*?)(?=\n\d{4,5}\s*[-–]|\Z)'
-    college_matches = re.finditer(college_pattern, text, re.DOTALL)
+    college_matches = COLLEGE_RE.finditer(text)
     
     for college_match in college_matches:
         college_code = college_match.group(1)
         college_block = college_match.group(2).strip()
         
         # Extract institute name and district
-        institute_name_pattern = r'^(.*?)(?=\n\d{6,}\s*[-–]|\nStatus|\Z)'
-        institute_match = re.search(institute_name_pattern, college_block, re.MULTILINE | re.DOTALL)
+        institute_match = INSTITUTE_NAME_RE.search(college_block)
         institute_name = institute_match.group(1).strip() if institute_match else "Unknown"
         
         # Extract district from institute name (e.g., "Amravati" from "Government College of Engineering, Amravati")
-        district_pattern = r',\s*(\w+)$|(\w+)\s*(?:University|College|Institute)'
-        district_match = re.search(district_pattern, institute_name)
+        district_match = DISTRICT_RE.search(institute_name)
         district = district_match.group(1) or district_match.group(2) if district_match else "Unknown"
         
         # Extract branch and seat data
-        branch_pattern = r'(\d{6,})\s*[-–]\s*(.*?)(?=\n\d{6,}\s*[-–]|\Z)'
-        branch_matches = re.finditer(branch_pattern, college_block, re.DOTALL)
+        branch_matches = BRANCH_RE.finditer(college_block)
         
         for branch_match in branch_matches:
             branch_code = branch_match.group(1)
@@ -88,14 +149,12 @@ def extract_data_from_text(text):
             branch_name = branch_block.split('\n')[0].strip()
             
             # Extract status for Home University
-            status_pattern = r'Status:\s*(.*?)(?=\n|$)'
-            status_match = re.search(status_pattern, branch_block)
+            status_match = STATUS_RE.search(branch_block)
             status = status_match.group(1).strip() if status_match else "Unknown"
             home_university = "Autonomous Institute" if status_match and "Autonomous" in status_match.group(1) else status if status_match else "Unknown"
             
             # Extract seat data from all sections
-            section_pattern = r'(State Level|Home University Seats.*?|Other Than Home University Seats.*?)\s*(?:Stage\s+([A-Z\s:]+?)\s*[\|\s]\s*([\d\s,]+?)(?:\s*(\(.*?)?)?)'
-            section_matches = re.finditer(section_pattern, branch_block, re.DOTALL)
+            section_matches = SECTION_RE.finditer(branch_block)
             
             for section_match in section_matches:
                 seat_types_str = section_match.group(2).strip() if section_match.group(2) else ""
@@ -103,72 +162,66 @@ def extract_data_from_text(text):
                 percentiles_str = section_match.group(4).strip() if section_match.group(4) else ""
                 
                 # Clean and split seat types
-                seat_types = re.findall(r'[A-Z][A-Z0-9]+', seat_types_str.replace(':', ''))
+                seat_types = SEAT_TYPE_RE.findall(seat_types_str.replace(':', ''))
                 
                 # Split ranks (ensure proper parsing)
                 ranks = [int(rank.replace(',', '')) for rank in ranks_str.split() if rank.replace(',', '').isdigit()]
                 
                 # Split percentiles (capture full string after ranks)
-                percentiles = re.findall(r'\((\d+\.\d+|\d+)\)', percentiles_str)
+                percentiles = PERCENTILE_RE.findall(percentiles_str)
                 percentiles = [float(p) for p in percentiles]
                 
                 # Debug logging
-                logging.debug(f"Section: {section_match.group(1)}, Seat Types: {seat_types}, Ranks: {ranks}, Percentiles: {percentiles}")
+                logging.debug("Section: %s, Seat Types: %s, Ranks: %s, Percentiles: %s", section_match.group(1), seat_types, ranks, percentiles)
                 
                 # Align lists
                 min_length = min(len(seat_types), len(ranks), len(percentiles) if percentiles else len(ranks))
                 if min_length == 0:
-                    logging.warning(f"No valid data in section: {section_match.group(1)}")
+                    logging.warning("No valid data in section: %s", section_match.group(1))
                     continue
                 seat_types = seat_types[:min_length]
                 ranks = ranks[:min_length]
                 percentiles = percentiles[:min_length] if percentiles else [None] * min_length
                 
-                # Pair seat types with ranks and percentiles
-                for seat_type, rank, percentile in zip(seat_types, ranks, percentiles):
-                    extracted_data.append({
-                        "District": district,
-                        "Home University": home_university,
-                        "Institute Name": institute_name,
-                        "College Code": college_code,
-                        "Branch Code": branch_code,
-                        "Branch Name": branch_name,
-                        "Status": status,
-                        "Seat Type": seat_type,
-                        "Cutoff (Rank)": rank,
-                        "Cutoff (Percentile)": percentile
-                    })
+                # Pair seat types with ranks and percentiles, one row per seat type
+                for column, value in (("District", district), ("Home University", home_university),
+                                      ("Institute Name", institute_name), ("College Code", college_code),
+                                      ("Branch Code", branch_code), ("Branch Name", branch_name), ("Status", status)):
+                    extracted_data[column].extend([value] * min_length)
+                extracted_data["Seat Type"].extend(seat_types)
+                extracted_data["Cutoff (Rank)"].extend(ranks)
+                extracted_data["Cutoff (Percentile)"].extend(percentiles)
     
-    if not extracted_data:
+    if not extracted_data["Seat Type"]:
         st.warning("No data matched the extraction patterns. Full OCR text:\n" + text[:1000])
-        logging.warning("No data extracted. Sample OCR text:\n" + text[:1000])
+        logging.warning("No data extracted. Sample OCR text:\n%s", text[:1000])
     
     return extracted_data
 
 def create_excel_file(data):
-    """Convert data to Excel format"""
-    if not data:
+    """Convert data (one list per column of COLUMNS) to Excel format"""
+    if not data["Seat Type"]:
         return None
         
-    df = pd.DataFrame(data)
-    df.insert(0, "Sr", range(1, len(df) + 1))
-    columns_order = ["Sr", "District", "Home University", "Institute Name", "College Code", 
-                     "Branch Code", "Branch Name", "Status", "Seat Type", "Cutoff (Rank)", "Cutoff (Percentile)"]
-    df = df[columns_order]
-    
     output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name='Cutoff Data')
+    # Rows go straight into the sheet; constant_memory flushes each one to a temp file instead of
+    # holding the whole table in RAM. No cell is a link, so skip the per-string URL check.
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True, 'strings_to_urls': False})
+    worksheet = workbook.add_worksheet('Cutoff Data')
+    worksheet.write_row(0, 0, ("Sr",) + COLUMNS, workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}))
+    for sr_no, row in enumerate(zip(*(data[column] for column in COLUMNS)), start=1):
+        worksheet.write_row(sr_no, 0, (sr_no,) + row)
+    workbook.close()
     return output.getvalue()
 
-def get_download_link(file_bytes, filename):
-    """Generate download link"""
-    b64 = base64.b64encode(file_bytes).decode()
-    return f'<a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}" download="{filename}">Download {filename}</a>'
-
 def process_pdf_file(uploaded_file):
     """Process the uploaded PDF file using OCR"""
-    ocr_text = ocr_pdf_to_text(uploaded_file, batch_size=5, dpi=200)
+    try:
+        ocr_text = ocr_pdf_to_text(uploaded_file.getvalue(), batch_size=5)
+    except IncompleteOCRError as e:
+        # Extract what was read; the upload is OCR'd again on the next rerun since nothing was cached
+        st.warning(f"{e}; extracting the pages that were read")
+        ocr_text = e.text
     extracted_data = extract_data_from_text(ocr_text)
     return extracted_data
 
@@ -184,13 +237,17 @@ def main():
         try:
             extracted_data = process_pdf_file(uploaded_file)
             
-            if extracted_data:
+            if extracted_data["Seat Type"]:
                 excel_bytes = create_excel_file(extracted_data)
                 
                 if excel_bytes:
-                    st.markdown(
-                        get_download_link(excel_bytes, f"cutoff_data_{uploaded_file.name.split('.')[0]}.xlsx"),
-                        unsafe_allow_html=True
+                    # Streamlit serves the file from its media endpoint instead of inlining it as base64 in the page
+                    file_name = f"cutoff_data_{uploaded_file.name.split('.')[0]}.xlsx"
+                    st.download_button(
+                        label=f"Download {file_name}",
+                        data=excel_bytes,
+                        file_name=file_name,
+                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
                     )
                     st.success("File processed successfully!")
                     
@@ -205,7 +262,7 @@ def main():
                 
         except Exception as e:
             st.error(f"An error occurred: {str(e)}")
-            logging.error(f"An error occurred in main: {str(e)}")
+            logging.error("An error occurred in main: %s", e)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,90 @@
+import threading
+from unittest import mock
+
+import openpyxl
+import pytest
+import streamlit as st
+
+import engg_pdf_extraction as engg
+
+COLLEGE = (
+    '1005 - Sant Gadge Baba Amravati University,Amravati\n'
+    '100551710 - Oil and Paints Technology\n'
+    'Status: University Department\n'
+)
+
+
+@pytest.fixture(autouse=True)
+def session_logs():
+    st.session_state.logs = []
+
+
+def extract_rows(*pages):
+    """Run cleaned page texts through extract_data_to_excel and return the sheet's data rows."""
+    output = engg.extract_data_to_excel(enumerate(pages, start=1), mock.Mock(), total_pages=len(pages))
+    sheet = openpyxl.load_workbook(output).active
+    return list(sheet.iter_rows(min_row=2))
+
+
+def test_text_layer_stage_markers_are_not_read_as_ranks():
+    page = COLLEGE + (
+        'Home University Seats Allotted to Home University Candidates\n'
+        'Stage GOPENH LOPENH\n'
+        'I 116850 73995\n'
+        '(34.1965462) (66.3914919)\n'
+        'II 134873 80001\n'
+        '(13.5034179) (60.1000000)\n'
+        'III 150211\n'
+        '(9.2500000)\n'
+    )
+
+    rows = [(r[1].value, r[8].value, r[9].value) for r in extract_rows(page)]
+
+    assert rows == [
+        (1, 'GOPENH', 116850), (1, 'LOPENH', 73995),
+        (2, 'GOPENH', 134873), (2, 'LOPENH', 80001),
+        (3, 'GOPENH', 150211),
+    ]
+
+
+def test_rank_and_percentile_cells_are_numbers():
+    page = COLLEGE + (
+        'Home University Seats Allotted to Home University Candidates\n'
+        'Stage GOPENH LOPENH\n'
+        'I 116850 73995\n'
+        '(34.1965462) (66.3914919)\n'
+    )
+
+    (first, second) = extract_rows(page)
+
+    for row, rank, percentile in ((first, 116850, 34.1965462), (second, 73995, 66.3914919)):
+        rank_cell, percentile_cell = row[9], row[10]
+        assert rank_cell.data_type == percentile_cell.data_type == 'n'
+        assert type(rank_cell.value) is int and rank_cell.value == rank
+        assert type(percentile_cell.value) is float and percentile_cell.value == pytest.approx(percentile)
+
+
+def test_rank_line_right_after_a_section_line_reuses_the_last_stage():
+    # The section line has no Stage line of its own. The old backtracking loop never stepped past
+    # a section or percentile line, so this page used to hang extraction.
+    page = COLLEGE + (
+        'Home University Seats Allotted to Home University Candidates\n'
+        'Stage GOPENH LOPENH\n'
+        'I 116850 73995\n'
+        '(34.1965462) (66.3914919)\n'
+        'Other Than Home University Seats Allotted to Other Than Home University Candidates\n'
+        'I 120400 76012\n'
+        '(31.0000000) (64.5000000)\n'
+    )
+    result = []
+    worker = threading.Thread(target=lambda: result.append(extract_rows(page)), daemon=True)
+
+    worker.start()
+    worker.join(timeout=10)
+
+    assert not worker.is_alive(), "extract_data_to_excel hung"
+    rows = [(r[8].value, r[9].value, r[10].value) for r in result[0]]
+    assert rows == [
+        ('GOPENH', 116850, 34.1965462), ('LOPENH', 73995, 66.3914919),
+        ('GOPENH', 120400, 31.0), ('LOPENH', 76012, 64.5),
+    ]
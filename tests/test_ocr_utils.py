@@ -0,0 +1,51 @@
+import subprocess
+
+import ocr_utils
+from ocr_utils import MIN_TEXT_LAYER_CHARS, extract_text_layer
+
+
+def fake_pdftotext(monkeypatch, stdout):
+    calls = []
+
+    def run(args, **kwargs):
+        calls.append((args, kwargs))
+        return subprocess.CompletedProcess(args, 0, stdout=stdout)
+
+    monkeypatch.setattr(ocr_utils.subprocess, 'run', run)
+    return calls
+
+
+def test_extract_text_layer_returns_none_for_short_pages(monkeypatch):
+    long_page = 'Stage   GOPENH   LOPENH\n' + 'x' * MIN_TEXT_LAYER_CHARS
+    short_page = 'x' * (MIN_TEXT_LAYER_CHARS - 1)
+    fake_pdftotext(monkeypatch, f'{long_page}\f{short_page}\f'.encode())
+
+    texts = extract_text_layer('cutoff.pdf', 4, 5)
+
+    # Layout padding is collapsed so text-layer pages look like OCR output
+    assert texts == ['Stage GOPENH LOPENH\n' + 'x' * MIN_TEXT_LAYER_CHARS, None]
+
+
+def test_extract_text_layer_returns_none_for_missing_and_blank_pages(monkeypatch):
+    fake_pdftotext(monkeypatch, b'   \n\f')
+
+    assert extract_text_layer('cutoff.pdf', 1, 3) == [None, None, None]
+
+
+def test_extract_text_layer_pipes_bytes_on_stdin(monkeypatch):
+    calls = fake_pdftotext(monkeypatch, b'')
+
+    extract_text_layer(b'%PDF-1.4', 2, 2)
+
+    args, kwargs = calls[0]
+    assert args[-2:] == ['-', '-']
+    assert kwargs['input'] == b'%PDF-1.4'
+
+
+def test_extract_text_layer_falls_back_to_ocr_when_pdftotext_fails(monkeypatch):
+    def run(args, **kwargs):
+        raise subprocess.CalledProcessError(1, args)
+
+    monkeypatch.setattr(ocr_utils.subprocess, 'run', run)
+
+    assert extract_text_layer('cutoff.pdf', 1, 2) == [None, None]